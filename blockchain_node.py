@@ -9,8 +9,13 @@ from flask import Flask, jsonify, request, render_template_string, redirect, url
 import threading
 import argparse
 import os
+from pathlib import Path
 import logging
 import uuid # For generating simple wallet addresses
+try:
+    import orjson # Much faster serialization of the saved node state
+except ImportError:
+    orjson = None # Fall back to the standard json module
 
 # --- Configuration ---
 # Logging will be configured in main after node_identifier is set
@@ -23,11 +28,15 @@ FAUCET_ADDRESS = "0" # Special address for minting/initial distribution
 # --- Block Class ---
 class Block:
     # (No changes needed in Block class itself for this update)
+    # Fixed attribute set: no per-instance __dict__, cheaper to build and read
+    __slots__ = ('index', 'timestamp', 'transactions', 'previous_hash', 'validator', 'hash')
+
     def __init__(self, index, timestamp, transactions, previous_hash, validator, hash=None): # Renamed hash_val to hash
         self.index = index
         # Ensure timestamp is float for consistency, default to time() if None
         self.timestamp = float(timestamp) if timestamp is not None else time()
-        self.transactions = transactions # List of transaction dicts
+        # List of transaction dicts, stored in canonical (timestamp) order so hashing never has to re-sort
+        self.transactions = sorted(transactions, key=lambda tx: tx['timestamp'])
         self.previous_hash = previous_hash
         self.validator = validator # Address of the node that forged this block
         # Calculate hash if not provided during init (e.g., when loading from storage)
@@ -39,8 +48,8 @@ class Block:
             {
                 "index": self.index,
                 "timestamp": self.timestamp,
-                # Ensure transactions are consistently ordered for hashing
-                "transactions": sorted(self.transactions, key=lambda tx: tx['timestamp']),
+                # Transactions are already sorted by timestamp in __init__
+                "transactions": self.transactions,
                 "previous_hash": self.previous_hash,
                 "validator": self.validator,
             },
@@ -59,9 +68,27 @@ class Block:
             "hash": self.hash,
         }
 
+def _header_hash(block_data):
+    """
+    Calculates the SHA-256 hash of a block given as a dict (e.g. received from a peer).
+    Byte-for-byte the same as Block(**block_data).calculate_hash(), without building a Block.
+    """
+    block_string = json.dumps(
+        {
+            "index": block_data['index'],
+            "timestamp": float(block_data['timestamp']), # Block.__init__ stores timestamps as float
+            "transactions": sorted(block_data['transactions'], key=lambda tx: tx['timestamp']),
+            "previous_hash": block_data['previous_hash'],
+            "validator": block_data['validator'],
+        },
+        sort_keys=True,
+    ).encode()
+    return hashlib.sha256(block_string).hexdigest()
+
+
 # --- Blockchain Class ---
 class Blockchain:
-    def __init__(self, node_identifier, data_file):
+    def __init__(self, node_identifier, data_file, genesis=None):
         self.chain = []
         self.pending_transactions = []
         self.nodes = set() # Set of peer node URLs (e.g., 'http://127.0.0.1:5001')
@@ -72,11 +99,16 @@ class Blockchain:
 
         # --- Wallet/Token related ---
         self.known_wallets = set() # Keep track of generated wallet addresses (optional)
+        self._reset_balance_index()
+
+        # Create the data directory once here rather than checking on every save
+        os.makedirs(DATA_DIR, exist_ok=True) # Allow directory to exist
 
         # Load existing data or create genesis block
         self.load_data()
         if not self.chain:
-            self.create_genesis_block()
+            # A pre-built genesis Block can be passed in (e.g. shared by several local nodes) to skip rehashing it
+            self.create_genesis_block(genesis)
             # Add node's own identifier to stakes if new chain
             if self.node_identifier not in self.stakes:
                  self.stakes[self.node_identifier] = 100 # Default initial stake
@@ -85,11 +117,10 @@ class Blockchain:
 
     def load_data(self):
         """Loads blockchain state from a file."""
-        if not os.path.exists(DATA_DIR):
-             os.makedirs(DATA_DIR, exist_ok=True) # Allow directory to exist
-
         try:
             if os.path.exists(self.data_file):
+                # Always read with stdlib json: orjson.loads quietly turns integers wider than 64 bits
+                # (which save_data's json fallback can write) into floats, breaking the block hashes
                 with open(self.data_file, 'r') as f:
                     data = json.load(f)
                     # Recreate Block objects from dictionaries
@@ -121,9 +152,7 @@ class Blockchain:
 
 
     def save_data(self):
-        """Saves blockchain state to a file."""
-        if not os.path.exists(DATA_DIR):
-             os.makedirs(DATA_DIR, exist_ok=True) # Allow directory to exist
+        """Saves blockchain state to a file. DATA_DIR is created once in __init__."""
         try:
             data = {
                 # Convert Block objects to dictionaries for JSON serialization
@@ -133,8 +162,19 @@ class Blockchain:
                 'stakes': self.stakes,
                 'known_wallets': list(self.known_wallets) # Save known wallets
             }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=4)
+            encoded = None
+            if orjson:
+                try:
+                    encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+                except orjson.JSONEncodeError as e:
+                    # e.g. an integer beyond 64 bits in a block received from a peer; json can still encode it
+                    logging.warning(f"orjson could not encode the node state ({e}); saving with json instead.")
+            if encoded is not None:
+                # Already-encoded bytes go straight to the file in a single write
+                Path(self.data_file).write_bytes(encoded)
+            else:
+                with open(self.data_file, 'w') as f:
+                    json.dump(data, f, indent=4)
             # logging.info(f"Blockchain data saved to {self.data_file}") # Can be noisy
         except IOError as e:
             logging.error(f"Error saving data to {self.data_file}: {e}")
@@ -142,15 +182,16 @@ class Blockchain:
              logging.error(f"An unexpected error occurred during save_data: {e}")
 
 
-    def create_genesis_block(self):
-        """Creates the first block in the chain."""
-        genesis_block = Block(
-            index=0,
-            timestamp=0, # Use fixed timestamp 0 for predictable genesis hash
-            transactions=[], # No transactions initially, use faucet address '0' later
-            previous_hash="0",
-            validator="Genesis",
-        )
+    def create_genesis_block(self, genesis_block=None):
+        """Creates the first block in the chain, or uses genesis_block if one is given."""
+        if genesis_block is None:
+            genesis_block = Block(
+                index=0,
+                timestamp=0, # Use fixed timestamp 0 for predictable genesis hash
+                transactions=[], # No transactions initially, use faucet address '0' later
+                previous_hash="0",
+                validator="Genesis",
+            )
         self.chain.append(genesis_block)
         logging.info("Genesis block created.")
 
@@ -159,40 +200,82 @@ class Blockchain:
         """Returns the most recent block in the chain."""
         return self.chain[-1]
 
-    def get_balance(self, address):
+    def _reset_balance_index(self):
         """
-        Calculates the balances (main and secondary tokens) of an address
-        by iterating through the chain.
-        NOTE: Inefficient for long chains. Real blockchains use optimized state databases.
-        Returns:
-            dict: A dictionary containing balances for TOKEN_NAME and SECONDARY_TOKEN_NAME.
-                  e.g., {'MAIN': 100, 'SECOND': 50}
+        Empties the balance index, which _sync_balances brings up to date lazily. The index is one tuple:
+        (chain list it was built from, number of blocks applied, last block applied, {address: {token_type: amount}}).
+        """
+        self._balance_index = (None, 0, None, {})
+
+    def _sync_balances(self):
         """
-        balances = {TOKEN_NAME: 0, SECONDARY_TOKEN_NAME: 0}
-        logging.debug(f"Calculating balances for address: {address}")
-        for block in self.chain:
+        Applies blocks added since the last sync to the balance index and returns the up-to-date balances.
+        The index is rebuilt from the start if the chain was replaced (e.g. by resolve_conflicts)
+        or its tail no longer matches the last block applied.
+        get_balance runs on Flask's request threads, so the published index is never modified in place:
+        changed accounts are copied, and the new (chain, height, tip, balances) tuple is published in a
+        single assignment. Concurrent syncs just compute the same result; none applies a block twice.
+        """
+        chain = self.chain
+        index_chain, height, tip, old_balances = self._balance_index
+        if (index_chain is not chain or len(chain) < height
+                or (height and chain[height - 1] is not tip)):
+            old_balances = {}
+            height = 0
+
+        new_blocks = chain[height:] # Copy taken once, so blocks appended meanwhile wait for the next sync
+        if not new_blocks and height:
+            return old_balances
+
+        # Local bindings keep attribute/global lookups out of the per-transaction loop
+        changed = {} # Copies of the accounts these blocks touch
+        empty = {TOKEN_NAME: 0, SECONDARY_TOKEN_NAME: 0}
+        valid_tokens = (TOKEN_NAME, SECONDARY_TOKEN_NAME)
+        main_token = TOKEN_NAME
+        for block in new_blocks:
             for tx in block.transactions:
                 try:
-                    amount = int(tx.get('amount', 0)) # Ensure amount is integer
-                    token_type = tx.get('token_type', TOKEN_NAME) # Default to main token if missing
+                    tx_get = tx.get
+                    amount = int(tx_get('amount', 0)) # Ensure amount is integer
+                    token_type = tx_get('token_type', main_token) # Default to main token if missing
 
                     # Ensure token_type is valid before proceeding
-                    if token_type not in balances:
+                    if token_type not in valid_tokens:
                         logging.warning(f"Skipping transaction in block {block.index} due to unknown token_type '{token_type}': {tx}")
                         continue
 
-                    if tx.get('recipient') == address:
-                        balances[token_type] += amount
-                        logging.debug(f"  Block {block.index}: +{amount} {token_type} (Received)")
-                    if tx.get('sender') == address:
-                        balances[token_type] -= amount
-                        logging.debug(f"  Block {block.index}: -{amount} {token_type} (Sent)")
+                    recipient = tx_get('recipient')
+                    recipient_balances = changed.get(recipient)
+                    if recipient_balances is None:
+                        recipient_balances = changed[recipient] = dict(old_balances.get(recipient) or empty)
+                    recipient_balances[token_type] += amount
+
+                    sender = tx_get('sender')
+                    sender_balances = changed.get(sender)
+                    if sender_balances is None:
+                        sender_balances = changed[sender] = dict(old_balances.get(sender) or empty)
+                    sender_balances[token_type] -= amount
                 except (ValueError, TypeError) as e:
                      logging.warning(f"Skipping transaction due to invalid amount in block {block.index}: {tx}. Error: {e}")
                      continue # Skip transaction if amount is invalid
-        logging.debug(f"Final calculated balances for {address}: {balances}")
+
+        balances = {**old_balances, **changed} if changed else old_balances
+        height += len(new_blocks)
+        self._balance_index = (chain, height, chain[height - 1] if height else None, balances)
         return balances
 
+    def get_balance(self, address):
+        """
+        Returns the balances (main and secondary tokens) of an address.
+        Reads the balance index, which only replays blocks added since the previous lookup.
+        Returns:
+            dict: A dictionary containing balances for TOKEN_NAME and SECONDARY_TOKEN_NAME.
+                  e.g., {'MAIN': 100, 'SECOND': 50}
+        """
+        balances = self._sync_balances().get(address)
+        logging.debug(f"Balances for {address}: {balances}")
+        return dict(balances) if balances else {TOKEN_NAME: 0, SECONDARY_TOKEN_NAME: 0}
+
     def add_transaction(self, sender, recipient, amount, token_type=TOKEN_NAME):
         """
         Adds a new transaction (main or secondary token) to the list of pending transactions.
@@ -271,33 +354,31 @@ class Blockchain:
 
     def select_validator(self):
         """
-        Selects the next validator based on stake (simplified weighted random choice).
+        Selects the next validator based on stake (weighted random choice).
         Returns the identifier (node address) of the chosen validator.
         """
         if not self.stakes:
             logging.warning("No stakes available to select a validator.")
             return None
 
-        # Filter out validators with zero or negative stake
+        # Same weighting as select_validators_batch; None if no validator has positive stake
+        chosen_validator = (self.select_validators_batch(1) or [None])[0]
+        if chosen_validator is not None:
+            logging.info(f"Selected validator: {chosen_validator} from candidates {[v for v, s in self.stakes.items() if s > 0]}")
+        return chosen_validator
+
+    def select_validators_batch(self, n):
+        """
+        Selects n validators in one call, each chosen with probability proportional to its stake
+        (stakes may be fractional). select_validator draws a single validator through this method.
+        Returns a list of validator identifiers (empty if no validator has positive stake).
+        """
         eligible_validators = {v: s for v, s in self.stakes.items() if s > 0}
         if not eligible_validators:
              logging.warning("No validators with positive stake found.")
-             return None
-
-        total_stake = sum(eligible_validators.values())
-
-        # Create a list of validators weighted by their stake
-        weighted_validators = []
-        for validator, stake in eligible_validators.items():
-            weighted_validators.extend([validator] * stake) # Add validator 'stake' times
-
-        if not weighted_validators:
-             logging.warning("Weighted validator list is empty after filtering. Cannot select validator.")
-             return None
+             return []
 
-        chosen_validator = random.choice(weighted_validators)
-        logging.info(f"Selected validator: {chosen_validator} from candidates {list(eligible_validators.keys())}")
-        return chosen_validator
+        return random.choices(list(eligible_validators), weights=list(eligible_validators.values()), k=n)
 
 
     def create_new_block(self, validator):
@@ -313,8 +394,8 @@ class Blockchain:
         new_block = Block(
             index=previous_block.index + 1,
             timestamp=time(),
-            # Include pending transactions, ensure they are sorted for consistent hashing
-            transactions=sorted(self.pending_transactions, key=lambda tx: tx['timestamp']),
+            # Include pending transactions (Block sorts them for consistent hashing)
+            transactions=self.pending_transactions,
             previous_hash=previous_block.hash,
             validator=validator,
         )
@@ -338,19 +419,16 @@ class Blockchain:
         # --- Validate Genesis Block ---
         try:
             genesis_block_data = chain_to_validate[0]
-            # Basic check of genesis block structure before creating object
+            # Basic check of genesis block structure
             if genesis_block_data.get('index') != 0 or genesis_block_data.get('previous_hash') != "0":
                  logging.warning("Genesis block invalid (index or previous_hash).")
                  return False
-            genesis_block = Block(**genesis_block_data) # Recreate Block object
-            # Verify genesis block hash
-            genesis_hash_to_verify = genesis_block.hash
-            genesis_block.hash = None
-            recalculated_genesis_hash = genesis_block.calculate_hash()
-            genesis_block.hash = genesis_hash_to_verify # Put back
-            if genesis_hash_to_verify != recalculated_genesis_hash:
+            # Verify genesis block hash straight from the dict
+            if genesis_block_data['hash'] != _header_hash(genesis_block_data):
                  logging.warning("Genesis block hash is invalid.")
                  return False
+            # Hash of the last verified block, so the previous block is never rehashed
+            previous_hash = genesis_block_data['hash']
 
         except (KeyError, TypeError) as e:
              logging.warning(f"Genesis block validation failed due to invalid data: {e}")
@@ -361,9 +439,8 @@ class Blockchain:
         for i in range(1, len(chain_to_validate)):
             try:
                 current_block_data = chain_to_validate[i]
-                previous_block_data = chain_to_validate[i-1]
 
-                # Basic structure check before creating objects
+                # Basic structure check before hashing
                 if not all(k in current_block_data for k in ['index', 'previous_hash', 'hash', 'transactions', 'timestamp', 'validator']):
                      logging.warning(f"Chain invalid: Block {i} has missing fields.")
                      return False
@@ -371,25 +448,19 @@ class Blockchain:
                      logging.warning(f"Chain invalid: Block index mismatch at index {i}. Expected {i}, got {current_block_data.get('index')}")
                      return False
 
-                # Recreate Block objects for validation
-                current_block = Block(**current_block_data)
-                previous_block = Block(**previous_block_data) # Already validated in previous iteration or genesis check
-
                 # 1. Check if the previous_hash points correctly
-                if current_block.previous_hash != previous_block.hash:
-                    logging.warning(f"Chain invalid: Previous hash mismatch at block {current_block.index}.")
-                    logging.warning(f"  Block {current_block.index} previous_hash: {current_block.previous_hash}")
-                    logging.warning(f"  Block {previous_block.index} hash: {previous_block.hash}")
+                if current_block_data['previous_hash'] != previous_hash:
+                    logging.warning(f"Chain invalid: Previous hash mismatch at block {i}.")
+                    logging.warning(f"  Block {i} previous_hash: {current_block_data['previous_hash']}")
+                    logging.warning(f"  Block {i-1} hash: {previous_hash}")
                     return False
 
-                # 2. Check if the block's own hash is correct
-                hash_to_verify = current_block.hash
-                current_block.hash = None # Remove hash before recalculating
-                recalculated_hash = current_block.calculate_hash()
-                current_block.hash = hash_to_verify # Put it back
+                # 2. Check if the block's own hash is correct (hashed from the dict, no Block object)
+                hash_to_verify = current_block_data['hash']
+                recalculated_hash = _header_hash(current_block_data)
 
                 if hash_to_verify != recalculated_hash:
-                    logging.warning(f"Chain invalid: Block hash incorrect at block {current_block.index}.")
+                    logging.warning(f"Chain invalid: Block hash incorrect at block {i}.")
                     logging.warning(f"  Stored hash: {hash_to_verify}")
                     logging.warning(f"  Recalculated hash: {recalculated_hash}")
                     return False
@@ -397,17 +468,19 @@ class Blockchain:
                 # 3. (Optional but recommended) Basic Transaction Validation within Block
                 #    - Ensure amounts are positive integers
                 #    - Could add more checks here (e.g., format of addresses)
-                for tx in current_block.transactions:
+                for tx in current_block_data['transactions']:
                      # Check amount validity
                      if not isinstance(tx.get('amount'), int) or tx.get('amount', 0) <= 0:
-                          logging.warning(f"Chain invalid: Block {current_block.index} contains transaction with invalid amount: {tx}")
+                          logging.warning(f"Chain invalid: Block {i} contains transaction with invalid amount: {tx}")
                           return False
                      # Check token_type validity (allow missing, defaults to main)
                      token_type = tx.get('token_type', TOKEN_NAME)
                      if token_type not in [TOKEN_NAME, SECONDARY_TOKEN_NAME]:
-                          logging.warning(f"Chain invalid: Block {current_block.index} contains transaction with invalid token_type '{token_type}': {tx}")
+                          logging.warning(f"Chain invalid: Block {i} contains transaction with invalid token_type '{token_type}': {tx}")
                           return False
 
+                previous_hash = hash_to_verify
+
             except (KeyError, TypeError) as e:
                  logging.warning(f"Chain validation failed at block {i} due to invalid data: {e}")
                  return False
@@ -1028,11 +1101,9 @@ def receive_block():
          logging.warning(f"Received block {received_block.index} has incorrect previous hash ({received_block.previous_hash} != {last_block.hash}).")
          return jsonify({'message': 'Block rejected: Previous hash mismatch.'}), 400
 
-    # 3. Recalculate hash to verify integrity
+    # 3. Recalculate hash to verify integrity (calculate_hash never reads the block's own hash)
     hash_to_verify = received_block.hash
-    received_block.hash = None # Remove hash before recalculating
     recalculated_hash = received_block.calculate_hash()
-    received_block.hash = hash_to_verify # Put it back
 
     if hash_to_verify != recalculated_hash:
          logging.warning(f"Received block {received_block.index} has invalid hash (recalculated: {recalculated_hash}).")
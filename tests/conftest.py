@@ -0,0 +1,217 @@
+import pytest
+import hashlib
+import json
+import os
+from unittest.mock import patch
+
+import blockchain_node
+from blockchain_node import Blockchain, Block, FAUCET_ADDRESS, DATA_DIR, TOKEN_NAME, SECONDARY_TOKEN_NAME
+
+
+def pytest_configure(config):
+    """Registers the custom markers used across the test suite."""
+    config.addinivalue_line(
+        "markers",
+        "mutates_chain: test changes the node's blockchain and needs its own fresh instance",
+    )
+
+
+# --- Pinned Clock ---
+# The one fixed timestamp used by all test data (and the template chain's clock), so hashes are constants.
+# The other test modules import it from here.
+
+FIXED_TS = 1_700_000_000
+
+
+# --- Shared Block Test Data ---
+# Timestamps are pinned so the expected hash is a constant, computed once at import time.
+
+SAMPLE_TX1 = {'sender': 'a', 'recipient': 'b', 'amount': 10, 'token_type': 'MAIN', 'timestamp': FIXED_TS - 10, 'transaction_id': 'tx1'}
+SAMPLE_TX2 = {'sender': 'c', 'recipient': 'd', 'amount': 5, 'token_type': 'SECOND', 'timestamp': FIXED_TS - 5, 'transaction_id': 'tx2'}
+
+# Mirrors Block.calculate_hash: transactions in timestamp order, keys sorted
+EXPECTED_SAMPLE_HASH = hashlib.sha256(json.dumps(
+    {
+        "index": 1,
+        "timestamp": float(FIXED_TS), # Block stores timestamps as float
+        "transactions": sorted([SAMPLE_TX1, SAMPLE_TX2], key=lambda tx: tx['timestamp']),
+        "previous_hash": "genesis_hash",
+        "validator": "node_1",
+    },
+    sort_keys=True,
+).encode()).hexdigest()
+
+
+@pytest.fixture
+def sample_block_data():
+    """Provides sample data to create a Block instance."""
+    return {
+        "index": 1,
+        "timestamp": float(FIXED_TS), # Block stores timestamps as float
+        "transactions": [SAMPLE_TX1, SAMPLE_TX2], # Use original unsorted list here for init test
+        "previous_hash": "genesis_hash",
+        "validator": "node_1",
+    }
+
+@pytest.fixture
+def expected_sample_hash():
+    """SHA-256 of the block built from sample_block_data."""
+    return EXPECTED_SAMPLE_HASH
+
+
+# --- Shared Blockchain Test Data ---
+# The other test modules import these from here, so the genesis hash is written down only once.
+
+TEST_NODE_ID = "test_node_1"
+GENESIS_BLOCK_DATA = { # Block(0, 0, [], "0", "Genesis").to_dict(), hash precomputed
+    'index': 0, 'timestamp': 0.0, 'transactions': [], 'previous_hash': '0', 'validator': 'Genesis',
+    'hash': 'a460a3d7e1ce74dac5419ca0bbd34b5796fb9be7b6e145408af0a48dbccf1ec2',
+}
+
+
+# --- Shared Blockchain Fixtures ---
+
+@pytest.fixture(autouse=True, scope="session")
+def _session_data_dir(tmp_path_factory):
+    """
+    Points blockchain_node.DATA_DIR at a temporary directory for the whole session,
+    so save_data can write real files without any per-test os/open patching.
+    """
+    data_dir = tmp_path_factory.mktemp(DATA_DIR)
+    with patch('blockchain_node.DATA_DIR', str(data_dir)):
+        yield data_dir
+
+
+@pytest.fixture
+def test_data_dir(tmp_path):
+    """Create a temporary data directory for tests."""
+    data_path = tmp_path / DATA_DIR
+    data_path.mkdir(exist_ok=True)
+    return data_path
+
+@pytest.fixture(scope="session")
+def node_id():
+    """Return a sample node identifier."""
+    return TEST_NODE_ID
+
+@pytest.fixture
+def data_file_path(test_data_dir, node_id):
+    """Return the full path for the test data file."""
+    # Use a fixed port or ID for predictable filename in tests
+    port = 9999 # Or use node_id if it contains port info reliably
+    return os.path.join(test_data_dir, f"node_{port}_data.json")
+
+@pytest.fixture
+def blockchain_with_genesis(node_id, data_file_path):
+    """
+    Provides a Blockchain instance with only the genesis block created,
+    ensuring mocks are active during the test execution.
+    Returns the blockchain instance and the save_data mock.
+    """
+    blockchain = _make_bc(node_id, data_file_path)
+
+    # Fresh save_data stub per test, swapped in directly rather than via patch.object
+    saved_save = Blockchain.save_data
+    mock_save = _CallCounter()
+    Blockchain.save_data = mock_save
+    try:
+        yield blockchain, mock_save
+    finally:
+        Blockchain.save_data = saved_save
+
+@pytest.fixture
+def funded(blockchain_with_genesis):
+    """
+    Provides a blockchain with two fresh wallets, where the sender holds 200 MAIN
+    and 100 SECOND from a mined faucet block (block 1).
+    Returns (blockchain, sender, recipient, mock_save).
+    """
+    blockchain, mock_save = blockchain_with_genesis
+    sender, recipient = _fund_wallets(blockchain)
+    return blockchain, sender, recipient, mock_save
+
+@pytest.fixture(scope="session")
+def _valid_chain_template(node_id):
+    """Builds a short, valid chain once per session, as a list of block dicts."""
+    blockchain = _make_bc(node_id, None)
+    saved_save = Blockchain.save_data
+    Blockchain.save_data = _CallCounter()
+    # Pin the clock so the template's tx and block timestamps are fixed. Wallet addresses and
+    # transaction ids still come from uuid4, so the block hashes differ from one session to the next.
+    saved_time = blockchain_node.time
+    blockchain_node.time = lambda: FIXED_TS
+    try:
+        blockchain.stakes = {"validator1": 100, "validator2": 50} # Add stakes
+
+        # Block 1: Fund addr1 with both tokens
+        addr1, addr2 = _fund_wallets(blockchain, "validator1")
+
+        # Block 2: Transfer MAIN from addr1 to addr2
+        blockchain.add_transaction(addr1, addr2, 20, TOKEN_NAME)
+        blockchain.create_new_block("validator2") # Block 2
+
+        # Block 3: Transfer SECOND from addr1 to addr2
+        blockchain.add_transaction(addr1, addr2, 15, SECONDARY_TOKEN_NAME)
+        blockchain.create_new_block("validator1") # Block 3
+    finally:
+        Blockchain.save_data = saved_save
+        blockchain_node.time = saved_time
+
+    # Return chain data as list of dicts, like received over network
+    return [block.to_dict() for block in blockchain.chain]
+
+@pytest.fixture
+def valid_chain(_valid_chain_template):
+    """
+    Creates a short, valid chain for testing validation (a private copy per test).
+    Only the block dicts are copied; mutators that touch transactions must replace
+    the list and tx dicts rather than edit them in place.
+    """
+    return [dict(block) for block in _valid_chain_template]
+
+@pytest.fixture(scope="module")
+def validator_blockchain(node_id):
+    """
+    One Blockchain shared by the is_chain_valid tests.
+    is_chain_valid never reads or changes the receiver's own chain, so no per-test instance is needed.
+    """
+    return _make_bc(node_id, None)
+
+
+# --- Helper Functions ---
+
+class _CallCounter:
+    """
+    Minimal stand-in for save_data: counts calls and records nothing else.
+    Unlike MagicMock it keeps no call_args_list, so setup-heavy tests retain no call history.
+    """
+    def __init__(self):
+        self.call_count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.call_count += 1
+
+def _make_bc(node_id, data_file):
+    """
+    Builds a genesis-only Blockchain without running __init__ (no load_data, save_data or genesis hashing).
+    Mirrors the state __init__ leaves behind for a brand-new node; the init tests still use the real __init__.
+    """
+    blockchain = Blockchain.__new__(Blockchain)
+    blockchain.chain = [Block(**GENESIS_BLOCK_DATA)] # Hash is precomputed in GENESIS_BLOCK_DATA
+    blockchain.pending_transactions = []
+    blockchain.nodes = set()
+    blockchain.stakes = {node_id: 100} # Default initial stake
+    blockchain.known_wallets = set()
+    blockchain.node_identifier = node_id
+    blockchain.data_file = data_file
+    blockchain._reset_balance_index()
+    return blockchain
+
+def _fund_wallets(blockchain, validator=None):
+    """Creates a sender and recipient wallet, funds the sender from the faucet and mines the block."""
+    sender = blockchain.create_wallet()
+    recipient = blockchain.create_wallet()
+    blockchain.add_transaction(FAUCET_ADDRESS, sender, 200, TOKEN_NAME)
+    blockchain.add_transaction(FAUCET_ADDRESS, sender, 100, SECONDARY_TOKEN_NAME)
+    blockchain.create_new_block(validator or blockchain.node_identifier)
+    return sender, recipient
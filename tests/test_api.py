@@ -1,4 +1,5 @@
 import pytest
+import copy
 import json
 import os
 from time import time, sleep
@@ -8,41 +9,55 @@ from unittest.mock import patch, MagicMock
 # We need to ensure the app is configured for testing
 from flask import flash # Import flash for testing flash messages
 from blockchain_node import app as flask_app, Blockchain, Block, node_identifier, blockchain, DATA_DIR, FAUCET_ADDRESS, TOKEN_NAME, SECONDARY_TOKEN_NAME
+from tests.conftest import FIXED_TS, GENESIS_BLOCK_DATA
 
 # --- Test Fixtures ---
 
-@pytest.fixture(scope='function') # Use function scope for isolation
-def app_test_client(tmp_path):
+TEST_PORT = 9999
+TEST_NODE_ID = f"test_api_node:{TEST_PORT}"
+
+def _test_data_file(test_data_dir):
+    """Returns the node data file path inside the given test data directory."""
+    return os.path.join(test_data_dir, f"node_{TEST_PORT}_data.json")
+
+@pytest.fixture(scope='session')
+def pristine_test_data_dir(tmp_path_factory):
+    """Temporary data directory for the pristine blockchain."""
+    return tmp_path_factory.mktemp(DATA_DIR)
+
+@pytest.fixture(scope='session')
+def pristine_blockchain(pristine_test_data_dir):
+    """
+    Genesis-only Blockchain built once per session.
+    Read-only tests use it directly; tests marked @pytest.mark.mutates_chain get a deep copy.
+    """
+    with patch('blockchain_node.DATA_DIR', str(pristine_test_data_dir)):
+        return Blockchain(node_identifier=TEST_NODE_ID, data_file=_test_data_file(pristine_test_data_dir))
+
+@pytest.fixture(scope='function')
+def app_test_client(request, pristine_blockchain, pristine_test_data_dir):
     """Configures the Flask app for testing and provides a test client."""
-    # Use a temporary directory for test data
-    test_data_dir = tmp_path / DATA_DIR
-    test_data_dir.mkdir()
+    # Only tests marked 'mutates_chain' pay for their own copy; the rest share the pristine instance
+    if request.node.get_closest_marker('mutates_chain'):
+        # Use a temporary directory for test data
+        test_data_dir = request.getfixturevalue('tmp_path') / DATA_DIR
+        test_data_dir.mkdir()
+        # Copying skips re-running __init__ (genesis hashing, initial save)
+        test_blockchain = copy.deepcopy(pristine_blockchain)
+        test_blockchain.data_file = _test_data_file(test_data_dir)
+    else:
+        test_data_dir = pristine_test_data_dir
+        test_blockchain = pristine_blockchain
 
     # Configure app for testing
     flask_app.config['TESTING'] = True
     flask_app.config['SECRET_KEY'] = 'testing_secret_key' # Needed for flash messages
 
-    # Use a specific port/ID for the test node instance
-    test_port = 9999
-    test_node_id = f"test_api_node:{test_port}"
-    test_data_file = os.path.join(test_data_dir, f"node_{test_port}_data.json")
-
-    # --- Critical: Initialize blockchain *within* the app context for tests ---
-    # We need to override the globally initialized blockchain in blockchain_node.py
-    # One way is to patch the global variables before creating the client
-    # Another is to re-initialize within the fixture if the app structure allows
-
     # Patch the global variables that the app uses.
     # NOTE: Patching 'blockchain_node.blockchain' itself later is key.
-    # We don't need to patch data_file here as it's passed to the constructor.
-    with patch('blockchain_node.node_identifier', test_node_id), \
-         patch('blockchain_node.DATA_DIR', str(test_data_dir)), \
-         patch('os.makedirs') as mock_makedirs: # Patch os.makedirs globally for the fixture
-
-        # Initialize a *new* Blockchain instance specifically for this test client
-        # It now correctly uses the patched DATA_DIR and test_node_id to determine its data_file path.
-        # Calls to save_data within methods called by API endpoints will now have os.makedirs mocked.
-        test_blockchain = Blockchain(node_identifier=test_node_id, data_file=test_data_file)
+    # We don't need to patch data_file here as it's set on the instance above.
+    with patch('blockchain_node.node_identifier', TEST_NODE_ID), \
+         patch('blockchain_node.DATA_DIR', str(test_data_dir)):
 
         # Patch the global 'blockchain' instance used by the route handlers
         with patch('blockchain_node.blockchain', test_blockchain), \
@@ -53,10 +68,59 @@ def app_test_client(tmp_path):
             # Yield the client and the blockchain instance for tests to use/manipulate
             yield client, test_blockchain
 
-    # Cleanup (optional, tmp_path handles directory removal)
-    # print(f"Cleaning up test data file: {test_data_file}")
-    # if os.path.exists(test_data_file):
-    #     os.remove(test_data_file)
+
+# --- Prebuilt Block Data ---
+# Block.to_dict() outputs for a fixed timestamp, built against a genesis-only chain.
+# Kept as literals so the invalid receive_block tests don't re-hash a Block each run.
+
+GENESIS_HASH = GENESIS_BLOCK_DATA['hash']
+
+PREBUILT_INVALID_INDEX_LOW = { # Block(0, FIXED_TS, [], "some_hash", "v")
+    'index': 0, 'timestamp': FIXED_TS, 'transactions': [], 'previous_hash': 'some_hash', 'validator': 'v',
+    'hash': 'fb3555e26fcbf472ba9501ff8283e895144a5c04f2651babcd6ec8258cd1aa0b',
+}
+PREBUILT_INVALID_INDEX_HIGH = { # Block(2, FIXED_TS, [], "some_hash", "v")
+    'index': 2, 'timestamp': FIXED_TS, 'transactions': [], 'previous_hash': 'some_hash', 'validator': 'v',
+    'hash': '08925befc6d227c03f8a862004832a73829ab35dec14522847ca6e3aadc46aab',
+}
+PREBUILT_INVALID_PREV_HASH = { # Block(1, FIXED_TS, [], "wrong_prev_hash", "v")
+    'index': 1, 'timestamp': FIXED_TS, 'transactions': [], 'previous_hash': 'wrong_prev_hash', 'validator': 'v',
+    'hash': '812ef1ed60682413de3746295dd6e3f015a00419775c1e95797be4564b59e1c3',
+}
+PREBUILT_INVALID_HASH = { # Block(1, FIXED_TS, [], GENESIS_HASH, "v") with its hash tampered
+    'index': 1, 'timestamp': FIXED_TS, 'transactions': [], 'previous_hash': GENESIS_HASH, 'validator': 'v',
+    'hash': 'tampered_hash123',
+}
+
+
+# --- Expected Response Messages ---
+# Built once at import; matched against the raw response body bytes.
+
+MSG_MISSING_VALUES = b'Missing required values (sender, recipient, amount)'
+MSG_INVALID_AMOUNT = b'Invalid amount'
+MSG_INVALID_TOKEN_TYPE = b'Invalid token_type'
+MSG_OLD_BLOCK_INDEX = b'Index is not sequential (old block)'
+MSG_BLOCK_INDEX_TOO_FAR_AHEAD = b'Index out of order (too far ahead)'
+MSG_PREV_HASH_MISMATCH = b'Previous hash mismatch'
+MSG_HASH_VERIFICATION_FAILED = b'Hash verification failed'
+
+
+# --- Helper Functions ---
+
+def seed_balance(blockchain_instance, addr, balances):
+    """
+    Credits addr with {token_type: amount} by appending a prebuilt faucet block.
+    Skips add_transaction (validation, UUIDs, save_data) for tests that only need funds.
+    """
+    last_block = blockchain_instance.last_block
+    transactions = [
+        {'sender': FAUCET_ADDRESS, 'recipient': addr, 'amount': amount, 'token_type': token_type,
+         'timestamp': FIXED_TS, 'transaction_id': f'seed_{addr}_{token_type}'}
+        for token_type, amount in balances.items()
+    ]
+    blockchain_instance.chain.append(
+        Block(last_block.index + 1, FIXED_TS, transactions, last_block.hash, FAUCET_ADDRESS)
+    )
 
 
 # --- Test Cases ---
@@ -74,6 +138,7 @@ def test_get_chain(app_test_client):
     assert data['chain'][0]['index'] == 0
 
 
+@pytest.mark.mutates_chain
 def test_new_transaction_json_success(app_test_client):
     """Test adding a transaction via JSON POST."""
     client, blockchain_instance = app_test_client
@@ -81,10 +146,7 @@ def test_new_transaction_json_success(app_test_client):
     recipient = blockchain_instance.create_wallet()
 
     # Fund the sender with both tokens
-    blockchain_instance.add_transaction(FAUCET_ADDRESS, sender, 100, TOKEN_NAME)
-    blockchain_instance.add_transaction(FAUCET_ADDRESS, sender, 50, SECONDARY_TOKEN_NAME)
-    blockchain_instance.create_new_block(blockchain_instance.node_identifier)
-    blockchain_instance.pending_transactions = [] # Clear pending after mining
+    seed_balance(blockchain_instance, sender, {TOKEN_NAME: 100, SECONDARY_TOKEN_NAME: 50})
 
     # Test sending MAIN token
     tx_data_main = {'sender': sender, 'recipient': recipient, 'amount': 30, 'token_type': TOKEN_NAME}
@@ -127,19 +189,20 @@ def test_new_transaction_invalid_data_json(app_test_client):
     response = client.post('/transactions/new', json={'sender': 'a', 'amount': 10})
     assert response.status_code == 400
     # Update assertion to match the new error message
-    assert b'Missing required values (sender, recipient, amount)' in response.data
+    assert MSG_MISSING_VALUES in response.get_data()
 
     # Invalid amount
     response = client.post('/transactions/new', json={'sender': 'a', 'recipient': 'b', 'amount': -5})
     assert response.status_code == 400
-    assert b'Invalid amount' in response.data
+    assert MSG_INVALID_AMOUNT in response.get_data()
 
     # Invalid token_type
     response = client.post('/transactions/new', json={'sender': 'a', 'recipient': 'b', 'amount': 10, 'token_type': 'FAKECOIN'})
     assert response.status_code == 400
-    assert b'Invalid token_type' in response.data
+    assert MSG_INVALID_TOKEN_TYPE in response.get_data()
 
 
+@pytest.mark.mutates_chain
 def test_receive_block_success(app_test_client):
     """Test receiving a valid block via POST."""
     client, blockchain_instance = app_test_client
@@ -175,53 +238,53 @@ def test_receive_block_success(app_test_client):
 def test_receive_block_invalid_index(app_test_client):
     """Test receiving a block with an invalid index."""
     client, blockchain_instance = app_test_client
-    last_block = blockchain_instance.last_block
+    assert blockchain_instance.last_block.index == 0 # Prebuilt blocks assume a genesis-only chain
 
     # Block with index too low
-    block_data_low = Block(last_block.index, time(), [], "some_hash", "v").to_dict()
-    response = client.post('/receive_block', json=block_data_low)
+    response = client.post('/receive_block', json=PREBUILT_INVALID_INDEX_LOW)
     assert response.status_code == 400
-    assert b'Index is not sequential (old block)' in response.data
+    assert MSG_OLD_BLOCK_INDEX in response.get_data()
 
     # Block with index too high
-    block_data_high = Block(last_block.index + 2, time(), [], "some_hash", "v").to_dict()
-    response = client.post('/receive_block', json=block_data_high)
+    response = client.post('/receive_block', json=PREBUILT_INVALID_INDEX_HIGH)
     assert response.status_code == 400
-    assert b'Index out of order (too far ahead)' in response.data
+    assert MSG_BLOCK_INDEX_TOO_FAR_AHEAD in response.get_data()
 
 
 def test_receive_block_invalid_prev_hash(app_test_client):
     """Test receiving a block with incorrect previous hash."""
     client, blockchain_instance = app_test_client
-    last_block = blockchain_instance.last_block
-    block_data = Block(last_block.index + 1, time(), [], "wrong_prev_hash", "v").to_dict()
-    response = client.post('/receive_block', json=block_data)
+    assert blockchain_instance.last_block.index == 0
+    response = client.post('/receive_block', json=PREBUILT_INVALID_PREV_HASH)
     assert response.status_code == 400
-    assert b'Previous hash mismatch' in response.data
+    assert MSG_PREV_HASH_MISMATCH in response.get_data()
 
 
 def test_receive_block_invalid_hash(app_test_client):
     """Test receiving a block with a tampered hash."""
     client, blockchain_instance = app_test_client
-    last_block = blockchain_instance.last_block
-    new_block = Block(last_block.index + 1, time(), [], last_block.hash, "v")
-    block_data = new_block.to_dict()
-    block_data['hash'] = "tampered_hash123" # Tamper the hash
-    response = client.post('/receive_block', json=block_data)
+    assert PREBUILT_INVALID_HASH['previous_hash'] == blockchain_instance.last_block.hash
+    response = client.post('/receive_block', json=PREBUILT_INVALID_HASH)
     assert response.status_code == 400
-    assert b'Hash verification failed' in response.data
+    assert MSG_HASH_VERIFICATION_FAILED in response.get_data()
 
 
+def test_receive_block_null_timestamp(app_test_client):
+    """Test that a block with a null timestamp is rejected as a bad hash (400), not a server error."""
+    client, _ = app_test_client
+    response = client.post('/receive_block', json={**PREBUILT_INVALID_HASH, 'timestamp': None})
+    assert response.status_code == 400
+    assert MSG_HASH_VERIFICATION_FAILED in response.get_data()
+
+
+@pytest.mark.mutates_chain
 def test_get_balance_endpoint(app_test_client):
     """Test the '/balance/<address>' endpoint."""
     client, blockchain_instance = app_test_client
     addr1 = blockchain_instance.create_wallet()
-    addr2 = blockchain_instance.create_wallet()
 
-    # Fund addr1 with both tokens and mine
-    blockchain_instance.add_transaction(FAUCET_ADDRESS, addr1, 150, TOKEN_NAME)
-    blockchain_instance.add_transaction(FAUCET_ADDRESS, addr1, 75, SECONDARY_TOKEN_NAME)
-    blockchain_instance.create_new_block(blockchain_instance.node_identifier)
+    # Fund addr1 with both tokens
+    seed_balance(blockchain_instance, addr1, {TOKEN_NAME: 150, SECONDARY_TOKEN_NAME: 75})
 
     # Test balance for addr1 (JSON)
     response1_json = client.get(f'/balance/{addr1}', headers={'Accept': 'application/json'})
@@ -234,6 +297,21 @@ def test_get_balance_endpoint(app_test_client):
     assert data1['balances'][TOKEN_NAME] == 150
     assert data1['balances'][SECONDARY_TOKEN_NAME] == 75
 
+    # Removed HTML redirect test for simplicity due to test client issues
+    # # Test balance for addr1 (HTML redirect)
+    # response1_html = client.get(f'/balance/{addr1}', follow_redirects=True)
+    # assert response1_html.status_code == 200
+    # # Check if balance info is present in the redirected UI using the new format
+    # assert bytes(f'Balances for {addr1}:', 'utf-8') in response1_html.data
+    # assert bytes(f'<strong>{TOKEN_NAME}:</strong> 150', 'utf-8') in response1_html.data
+    # assert bytes(f'<strong>{SECONDARY_TOKEN_NAME}:</strong> 75', 'utf-8') in response1_html.data
+
+
+def test_get_balance_endpoint_unknown_address(app_test_client):
+    """Test the '/balance/<address>' endpoint for an address with no transactions."""
+    client, _ = app_test_client
+    addr2 = "unfunded_wallet_address"
+
     # Test balance for addr2 (JSON) - should be 0 for both
     response2_json = client.get(f'/balance/{addr2}', headers={'Accept': 'application/json'})
     assert response2_json.status_code == 200
@@ -242,12 +320,3 @@ def test_get_balance_endpoint(app_test_client):
     assert 'balances' in data2
     assert data2['balances'][TOKEN_NAME] == 0
     assert data2['balances'][SECONDARY_TOKEN_NAME] == 0
-
-    # Removed HTML redirect test for simplicity due to test client issues
-    # # Test balance for addr1 (HTML redirect)
-    # response1_html = client.get(f'/balance/{addr1}', follow_redirects=True)
-    # assert response1_html.status_code == 200
-    # # Check if balance info is present in the redirected UI using the new format
-    # assert bytes(f'Balances for {addr1}:', 'utf-8') in response1_html.data
-    # assert bytes(f'<strong>{TOKEN_NAME}:</strong> 150', 'utf-8') in response1_html.data
-    # assert bytes(f'<strong>{SECONDARY_TOKEN_NAME}:</strong> 75', 'utf-8') in response1_html.data
\ No newline at end of file
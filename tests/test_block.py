@@ -2,25 +2,7 @@ import pytest
 import hashlib
 import json
 from time import time
-from blockchain_node import Block # Assuming blockchain_node.py is in the root or PYTHONPATH
-
-# Sample data for testing (assuming blockchain_node defines TOKEN_NAME and SECONDARY_TOKEN_NAME)
-# If not, define them here or import them properly. For now, using strings directly.
-TX1 = {'sender': 'a', 'recipient': 'b', 'amount': 10, 'token_type': 'MAIN', 'timestamp': time() - 10, 'transaction_id': 'tx1'}
-TX2 = {'sender': 'c', 'recipient': 'd', 'amount': 5, 'token_type': 'SECOND', 'timestamp': time() - 5, 'transaction_id': 'tx2'}
-# Ensure consistent order for hashing tests
-SORTED_TX = sorted([TX1, TX2], key=lambda tx: tx['timestamp'])
-
-@pytest.fixture
-def sample_block_data():
-    """Provides sample data to create a Block instance."""
-    return {
-        "index": 1,
-        "timestamp": time(),
-        "transactions": [TX1, TX2], # Use original unsorted list here for init test
-        "previous_hash": "genesis_hash",
-        "validator": "node_1",
-    }
+from blockchain_node import Block, _header_hash # Assuming blockchain_node.py is in the root or PYTHONPATH
 
 @pytest.fixture
 def sample_block(sample_block_data):
@@ -32,30 +14,16 @@ def test_block_creation(sample_block, sample_block_data):
     """Test if a Block object is created with the correct attributes."""
     assert sample_block.index == sample_block_data["index"]
     assert sample_block.timestamp == sample_block_data["timestamp"]
-    # Transactions might be reordered internally for hashing, but should contain the same elements
-    assert len(sample_block.transactions) == len(sample_block_data["transactions"])
-    assert all(tx in sample_block.transactions for tx in sample_block_data["transactions"])
+    # Transactions are stored sorted by timestamp (canonical hashing order), not in input order
+    assert sample_block.transactions == sorted(sample_block_data["transactions"], key=lambda tx: tx['timestamp'])
     assert sample_block.previous_hash == sample_block_data["previous_hash"]
     assert sample_block.validator == sample_block_data["validator"]
     assert sample_block.hash is not None # Hash should be calculated on init
 
-def test_block_calculate_hash(sample_block, sample_block_data):
+def test_block_calculate_hash(sample_block, expected_sample_hash):
     """Test the hash calculation method."""
-    # Manually calculate the expected hash based on the logic in Block.calculate_hash
-    block_string = json.dumps(
-        {
-            "index": sample_block_data["index"],
-            "timestamp": sample_block_data["timestamp"],
-            "transactions": SORTED_TX, # Use the sorted list for hash calculation check
-            "previous_hash": sample_block_data["previous_hash"],
-            "validator": sample_block_data["validator"],
-        },
-        sort_keys=True,
-    ).encode()
-    expected_hash = hashlib.sha256(block_string).hexdigest()
-
-    # The block calculates its hash on init, so we compare against that
-    assert sample_block.hash == expected_hash
+    # The block calculates its hash on init; the expected digest is precomputed in conftest.py
+    assert sample_block.hash == expected_sample_hash
 
     # Test recalculation explicitly
     # Temporarily remove hash, recalculate, and check
@@ -64,7 +32,31 @@ def test_block_calculate_hash(sample_block, sample_block_data):
     recalculated_hash = sample_block.calculate_hash()
     sample_block.hash = original_hash # Restore original hash
 
-    assert recalculated_hash == expected_hash
+    assert recalculated_hash == expected_sample_hash
+
+def test_header_hash_matches_block_hash(sample_block_data, expected_sample_hash):
+    """Test that hashing the raw block dict gives the same digest as a Block, including unsorted transactions and an int timestamp."""
+    assert _header_hash(sample_block_data) == expected_sample_hash
+    assert _header_hash({**sample_block_data, "timestamp": int(sample_block_data["timestamp"])}) == expected_sample_hash
+
+def test_header_hash_ignores_hash_key(sample_block):
+    """Test that a block's own dict (hash key included) hashes back to its hash."""
+    assert _header_hash(sample_block.to_dict()) == sample_block.hash
+
+@pytest.mark.parametrize("field,values", [
+    pytest.param("index", (1.0, True, 1, 1.0, True), id="index_types"), # Equal in Python, encoded differently
+    pytest.param("validator", ({"b": 1, "a": 2},), id="dict_validator"), # Nested keys sorted too
+])
+def test_header_hash_matches_json_dumps(sample_block_data, field, values):
+    """Test that block hashes are SHA-256 of json.dumps(header, sort_keys=True), whatever was hashed before."""
+    def reference_hash(data):
+        header = {**data, "transactions": sorted(data["transactions"], key=lambda tx: tx['timestamp'])}
+        return hashlib.sha256(json.dumps(header, sort_keys=True).encode()).hexdigest()
+
+    for value in values:
+        data = {**sample_block_data, field: value}
+        assert _header_hash(data) == reference_hash(data)
+        assert Block(**data).hash == reference_hash(data)
 
 def test_block_to_dict(sample_block, sample_block_data):
     """Test the conversion of a Block object to a dictionary."""
@@ -72,7 +64,7 @@ def test_block_to_dict(sample_block, sample_block_data):
 
     assert block_dict["index"] == sample_block_data["index"]
     assert block_dict["timestamp"] == sample_block_data["timestamp"]
-    # Check transactions - order might differ from input but should match internal state
+    # Check transactions - sorted by timestamp, matching internal state
     assert block_dict["transactions"] == sample_block.transactions
     assert block_dict["previous_hash"] == sample_block_data["previous_hash"]
     assert block_dict["validator"] == sample_block_data["validator"]
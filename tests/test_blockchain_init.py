@@ -0,0 +1,192 @@
+import pytest
+import io
+import json
+import os
+from unittest.mock import patch # Using unittest.mock for mocking
+
+# Import necessary classes and constants from the main script
+import blockchain_node
+from blockchain_node import Blockchain, Block, TOKEN_NAME, SECONDARY_TOKEN_NAME
+from tests.conftest import FIXED_TS, GENESIS_BLOCK_DATA, _make_bc
+
+
+# --- Saved State Test Data ---
+# Sample data to be "loaded", built once at import instead of on every test run.
+# A fixed timestamp (FIXED_TS, from conftest) keeps the block hashes identical across runs.
+# Block dicts are written out with their precomputed hashes, so nothing is hashed at import
+# Ensure block 1 includes a valid timestamp and tx structure, including token_type
+_BLOCK1_TX = [{'sender': 'faucet', 'recipient': 'addrA', 'amount': 10, 'token_type': TOKEN_NAME, 'timestamp': FIXED_TS - 60, 'transaction_id': 'tx_load_1'}]
+_BLOCK1_DATA = { # Block(1, FIXED_TS - 50, _BLOCK1_TX, GENESIS_BLOCK_DATA['hash'], "validator1").to_dict()
+    'index': 1, 'timestamp': FIXED_TS - 50.0, 'transactions': _BLOCK1_TX,
+    'previous_hash': GENESIS_BLOCK_DATA['hash'], 'validator': 'validator1',
+    'hash': 'cd3da16e8c313add4f1aa5afa32faf77acf359e5e3c20e2501277a5f5aa00c16',
+}
+_PENDING_TX = [{'sender': 'addrA', 'recipient': 'addrB', 'amount': 5, 'token_type': SECONDARY_TOKEN_NAME, 'timestamp': FIXED_TS - 10, 'transaction_id': 'tx_pending_1'}]
+
+_EXISTING_DATA = {
+    'chain': [GENESIS_BLOCK_DATA, _BLOCK1_DATA],
+    'pending_transactions': _PENDING_TX,
+    'nodes': ['node1:5000', 'node2:5001'],
+    'stakes': {'validator1': 150, 'test_node_1': 50},
+    'known_wallets': ['wallet1', 'wallet2']
+}
+
+
+# --- Test Fixtures ---
+
+@pytest.fixture(scope="module")
+def loaded_state_bytes():
+    """The saved state file contents, serialized once per module the same way save_data writes them."""
+    if blockchain_node.orjson:
+        return blockchain_node.orjson.dumps(_EXISTING_DATA, option=blockchain_node.orjson.OPT_SORT_KEYS)
+    return json.dumps(_EXISTING_DATA).encode()
+
+@pytest.fixture
+def mock_blockchain_init_no_load(node_id, data_file_path):
+    """Initialize Blockchain without calling load_data (mocks it)."""
+    with patch.object(Blockchain, 'load_data') as mock_load, \
+         patch.object(Blockchain, 'save_data') as mock_save:
+        # Mock load_data to do nothing, prevent file access during init test
+        mock_load.return_value = None
+        blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path)
+        # Reset mocks if needed after init, depending on test scope
+        # mock_load.reset_mock()
+        # mock_save.reset_mock()
+    return blockchain, mock_load, mock_save # Return mocks for potential assertions
+
+
+# --- Helper Functions ---
+
+def _fake_open_factory(data):
+    """Returns an open() replacement that serves `data` (bytes) from an in-memory file, text or binary per mode."""
+    def _open(path, mode='r', *args, **kwargs):
+        return io.BytesIO(data) if 'b' in mode else io.StringIO(data.decode())
+    return _open
+
+
+# --- Test Cases ---
+
+def test_blockchain_initialization_new(node_id, data_file_path):
+    """Test initializing a new blockchain when no data file exists."""
+    assert not os.path.exists(data_file_path) # Fresh temporary directory, no data file yet
+
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path)
+
+    # Assertions
+    assert len(blockchain.chain) == 1 # Genesis block should be created
+    assert blockchain.chain[0].index == 0
+    assert blockchain.chain[0].previous_hash == "0"
+    assert blockchain.chain[0].validator == "Genesis"
+    assert blockchain.pending_transactions == []
+    assert blockchain.nodes == set()
+    assert blockchain.node_identifier == node_id
+    assert blockchain.data_file == data_file_path
+    # Check default stake for the node itself
+    assert node_id in blockchain.stakes
+    assert blockchain.stakes[node_id] == 100 # Default initial stake
+
+    # Check if save_data wrote the file during init (after genesis)
+    assert os.path.exists(data_file_path)
+
+
+def test_blockchain_initialization_with_genesis(node_id, data_file_path):
+    """Test that a pre-built genesis block is used as-is instead of creating a new one."""
+    genesis = Block(**GENESIS_BLOCK_DATA)
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path, genesis=genesis)
+
+    assert len(blockchain.chain) == 1
+    assert blockchain.chain[0] is genesis
+    assert blockchain.stakes[node_id] == 100 # Still set up like any new chain
+
+
+def test_make_bc_matches_init(node_id, data_file_path):
+    """Test that the conftest shortcut builder leaves the same attributes as a real new-node __init__."""
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path)
+    shortcut = _make_bc(node_id, data_file_path)
+    assert set(vars(shortcut)) == set(vars(blockchain))
+    assert [block.to_dict() for block in shortcut.chain] == [block.to_dict() for block in blockchain.chain]
+
+
+@patch('builtins.open')
+@patch('os.path.exists', return_value=True) # Simulate data file exists
+def test_blockchain_initialization_load_data(mock_exists, mock_file, node_id, data_file_path, loaded_state_bytes):
+    """Test initializing a blockchain from an existing data file."""
+    existing_data = _EXISTING_DATA
+    genesis_block_data = GENESIS_BLOCK_DATA
+    # Serve the file from a plain BytesIO (much lighter than mock_open)
+    mock_file.side_effect = _fake_open_factory(loaded_state_bytes)
+
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path)
+
+    # Assertions
+    assert mock_file.call_args.args == (data_file_path, 'r') # Check load call
+    assert len(blockchain.chain) == 2
+    assert blockchain.chain[0].index == 0
+    assert blockchain.chain[1].index == 1
+    # Block init now expects 'hash' not 'hash_val'
+    assert blockchain.chain[1].previous_hash == genesis_block_data['hash']
+    assert blockchain.chain[1].validator == "validator1"
+    # Ensure Block objects were created correctly
+    assert isinstance(blockchain.chain[0], Block)
+    assert isinstance(blockchain.chain[1], Block)
+    assert blockchain.chain[1].transactions == existing_data['chain'][1]['transactions'] # Check tx data loaded into block
+    assert blockchain.pending_transactions == existing_data['pending_transactions']
+    assert blockchain.nodes == set(existing_data['nodes'])
+    assert blockchain.stakes == existing_data['stakes']
+    assert blockchain.known_wallets == set(existing_data['known_wallets'])
+    assert blockchain.node_identifier == node_id
+    assert blockchain.data_file == data_file_path
+
+
+@patch('os.path.exists', return_value=False)
+def test_blockchain_load_data_file_not_found(mock_exists, node_id, data_file_path):
+    """Test load_data behavior when the file doesn't exist."""
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path) # Let init handle it
+    blockchain.load_data() # Call explicitly for test clarity if needed
+
+    # Should behave like a new blockchain after load fails
+    assert len(blockchain.chain) == 1 # Genesis block created by init
+    assert blockchain.pending_transactions == []
+    assert node_id in blockchain.stakes # Default stake should be set
+
+
+def test_save_and_reload_large_int(node_id, data_file_path):
+    """Test that state orjson cannot encode (an integer beyond 64 bits, e.g. from a peer's block) saves and reloads exactly."""
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path)
+    big_tx = {'sender': 'faucet', 'recipient': 'addrA', 'amount': 2**64 + 1, 'token_type': TOKEN_NAME, 'timestamp': FIXED_TS, 'transaction_id': 'tx_big'}
+    blockchain.chain.append(Block(1, FIXED_TS, [big_tx], blockchain.last_block.hash, "validator1"))
+    blockchain.save_data()
+
+    reloaded = Blockchain(node_identifier=node_id, data_file=data_file_path)
+
+    assert len(reloaded.chain) == 2
+    assert reloaded.chain[1].transactions[0]['amount'] == 2**64 + 1
+    assert reloaded.is_chain_valid([block.to_dict() for block in reloaded.chain])
+
+
+def test_save_and_load_without_orjson(node_id, data_file_path, monkeypatch):
+    """Test the json module fallback used when orjson is not installed: the saved state loads back unchanged."""
+    monkeypatch.setattr(blockchain_node, 'orjson', None)
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path)
+    blockchain.chain.append(Block(**_BLOCK1_DATA))
+    blockchain.save_data()
+
+    with open(data_file_path) as f:
+        assert json.load(f)['chain'] == [GENESIS_BLOCK_DATA, _BLOCK1_DATA]
+    reloaded = Blockchain(node_identifier=node_id, data_file=data_file_path)
+    assert [block.to_dict() for block in reloaded.chain] == [GENESIS_BLOCK_DATA, _BLOCK1_DATA]
+    assert reloaded.stakes == blockchain.stakes
+
+
+def test_blockchain_load_data_json_error(node_id, data_file_path):
+    """Test load_data behavior with corrupted JSON."""
+    invalid_json = "{'chain': [}" # Invalid JSON
+    with open(data_file_path, 'w') as f:
+        f.write(invalid_json)
+
+    # Expect load_data to fail and init to create genesis
+    blockchain = Blockchain(node_identifier=node_id, data_file=data_file_path)
+
+    assert len(blockchain.chain) == 1 # Genesis block created by init after load error
+    assert blockchain.pending_transactions == []
+    assert node_id in blockchain.stakes # Default stake should be set
@@ -0,0 +1,64 @@
+import pytest
+import random
+from collections import Counter
+
+
+# --- Test Fixtures ---
+
+@pytest.fixture
+def seeded_random():
+    """Seeds the global RNG for one test, then restores its previous state so the seed never leaks into later tests."""
+    saved_state = random.getstate()
+    random.seed(0)
+    yield
+    random.setstate(saved_state)
+
+
+# --- Test Cases ---
+
+@pytest.mark.parametrize("stakes,expected", [
+    pytest.param({}, None, id="no_stakes"),
+    pytest.param({"node1": 0, "node2": 0}, None, id="zero_stakes"),
+    pytest.param(None, "SELF", id="single_staker"), # Only this node has stake
+    pytest.param({"node1": 0, "node2": 0.5}, "node2", id="fractional_stake"),
+])
+def test_select_validator_edge(blockchain_with_genesis, stakes, expected):
+    """Test validator selection with no stakes, all-zero stakes, and a single staker."""
+    blockchain, _ = blockchain_with_genesis
+    blockchain.stakes = stakes if stakes is not None else {blockchain.node_identifier: 100}
+    validator = blockchain.select_validator()
+    assert validator == (blockchain.node_identifier if expected == "SELF" else expected)
+
+
+@pytest.mark.parametrize("select_many", [
+    pytest.param(lambda blockchain, n: [blockchain.select_validator() for _ in range(n)], id="select_validator"),
+    pytest.param(lambda blockchain, n: blockchain.select_validators_batch(n), id="batch"),
+])
+def test_select_validator_multiple_stakers(blockchain_with_genesis, seeded_random, select_many):
+    """Test validator selection with multiple stakers (probabilistic), one at a time and in a batch."""
+    blockchain, _ = blockchain_with_genesis
+    node1, node2, node3 = "node1", "node2", "node3"
+    blockchain.stakes = {node1: 10, node2: 90, node3: 0} # node2 should be chosen more often
+
+    # seeded_random keeps the ratio checks below deterministic even with a small sample
+    num_selections = 200
+    counts = Counter(select_many(blockchain, num_selections))
+
+    assert counts[node3] == 0 # Node3 has 0 stake, should never be chosen
+    assert counts[node1] > 0   # Node1 should be chosen sometimes
+    assert counts[node2] > 0   # Node2 should be chosen sometimes
+    # Check if node2 was chosen significantly more often than node1 (roughly 9:1 ratio expected)
+    # Use a tolerance due to randomness
+    assert counts[node2] > counts[node1] * 5 # Expect node2 count to be much higher
+    assert (counts[node1] + counts[node2]) == num_selections
+
+
+@pytest.mark.parametrize("stakes", [
+    pytest.param({}, id="no_stakes"),
+    pytest.param({"node1": 0, "node2": 0}, id="zero_stakes"),
+])
+def test_select_validators_batch_no_eligible(blockchain_with_genesis, stakes):
+    """Test batch validator selection when no validator has positive stake."""
+    blockchain, _ = blockchain_with_genesis
+    blockchain.stakes = stakes
+    assert blockchain.select_validators_batch(10) == []
@@ -0,0 +1,86 @@
+import pytest
+import json
+
+# Import necessary classes and constants from the main script
+import blockchain_node
+
+
+# --- is_chain_valid Tests ---
+
+# Hashes by block content, shared by every validation test in the session
+_HASH_CACHE = {}
+
+@pytest.fixture(autouse=True)
+def memoized_header_hash():
+    """
+    Swaps blockchain_node._header_hash for a version memoized on the block dict's full content,
+    so blocks shared by the validation tests are hashed once instead of once per test.
+    Swapped per test and autouse only in this module, so no other test ever sees the memoized function.
+    """
+    original = blockchain_node._header_hash
+
+    def _header_hash(block_data):
+        # Keyed on the JSON encoding, so values Python treats as equal (1, 1.0, True) don't share an entry
+        key = json.dumps({k: v for k, v in block_data.items() if k != 'hash'}, sort_keys=True)
+        if key not in _HASH_CACHE:
+            _HASH_CACHE[key] = original(block_data)
+        return _HASH_CACHE[key]
+
+    blockchain_node._header_hash = _header_hash
+    try:
+        yield
+    finally:
+        blockchain_node._header_hash = original
+
+
+def test_is_chain_valid_success(validator_blockchain, valid_chain):
+    """Test validation of a correct chain."""
+    assert validator_blockchain.is_chain_valid(valid_chain) is True
+
+
+def test_is_chain_valid_empty_chain(validator_blockchain):
+    """Test validation of an empty chain."""
+    assert validator_blockchain.is_chain_valid([]) is False
+
+
+def _rehash_block(chain, i):
+    """Recalculates block i's hash *as if* its current data was originally included,
+    so the hash check itself passes and the internal tx validation is reached."""
+    chain[i]['hash'] = blockchain_node._header_hash(chain[i]) # The stored hash is not part of the header
+
+def _replace_first_tx(chain, field, value):
+    """Sets a field on block 1's first transaction, copying the tx list and dict so the template stays intact."""
+    txs = list(chain[1]['transactions'])
+    txs[0] = {**txs[0], field: value}
+    chain[1]['transactions'] = txs
+
+def _tamper_transaction_amount(chain):
+    """Changes the amount in the first transaction of block 1 without fixing its hash."""
+    _replace_first_tx(chain, 'amount', 9999)
+
+def _invalid_tx_field_in_block(field, value):
+    """Returns a mutator that sets an invalid transaction field in block 1 and rehashes it."""
+    def mutate(chain):
+        _replace_first_tx(chain, field, value)
+        _rehash_block(chain, 1)
+    return mutate
+
+
+@pytest.mark.parametrize("mutator", [
+    pytest.param(lambda c: c[0].__setitem__('index', 1), id='bad_genesis_index'),
+    pytest.param(lambda c: c[0].__setitem__('previous_hash', "tampered"), id='bad_genesis_prev_hash'),
+    pytest.param(lambda c: c[0].__setitem__('hash', "tampered_hash"), id='bad_genesis_hash'),
+    pytest.param(lambda c: c[1].__setitem__('index', 5), id='bad_block_index'),
+    pytest.param(lambda c: c[1].__setitem__('previous_hash', "tampered_prev_hash"), id='bad_prev_hash_link'),
+    pytest.param(lambda c: c[1].__setitem__('hash', "tampered_block_hash"), id='bad_block_hash'),
+    # The stored hash of block 1 will no longer match the recalculated hash
+    pytest.param(_tamper_transaction_amount, id='tampered_transaction'),
+    # Hash is recalculated, so validation fails on the transaction checks themselves
+    pytest.param(_invalid_tx_field_in_block('amount', -5), id='invalid_tx_amount_in_block'),
+    pytest.param(_invalid_tx_field_in_block('token_type', "INVALID_TOKEN"), id='invalid_tx_token_type_in_block'),
+])
+def test_is_chain_valid_failure(validator_blockchain, valid_chain, mutator):
+    """Test validation failure for a chain with one tampered field."""
+    mutator(valid_chain)
+    assert validator_blockchain.is_chain_valid(valid_chain) is False
+
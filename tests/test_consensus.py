@@ -1,51 +1,112 @@
 import pytest
+import pickle
+from types import SimpleNamespace
+from functools import lru_cache
+from urllib.parse import urlparse
 import json
-import os
-from time import time, sleep
-from unittest.mock import patch, MagicMock
+try:
+    import orjson # Same optional fast path blockchain_node uses
+    _dumps, _loads = orjson.dumps, orjson.loads
+except ImportError:
+    _dumps, _loads = json.dumps, json.loads
+
+import requests
 
 # Import necessary classes and constants
-from blockchain_node import Blockchain, Block, FAUCET_ADDRESS, DATA_DIR
+import blockchain_node
+from blockchain_node import Blockchain, Block, FAUCET_ADDRESS, _header_hash
+
+# No real network access from this module (pytest-socket): a stray request fails at once instead of timing out
+pytestmark = pytest.mark.disable_socket
 
 # --- Test Fixtures ---
 
-@pytest.fixture
-def test_data_dir_consensus(tmp_path):
-    """Create a temporary data directory specifically for consensus tests."""
-    data_path = tmp_path / "consensus_data"
-    data_path.mkdir()
-    # Patch the global DATA_DIR used by Blockchain instances if necessary,
-    # or ensure instances use this path directly.
-    # For simplicity, we'll pass the data_file path directly.
-    return data_path
+@pytest.fixture(autouse=True)
+def _no_persistence(monkeypatch):
+    """Stubs out save_data/load_data: consensus tests only check in-memory chains, never the files."""
+    monkeypatch.setattr(Blockchain, 'save_data', lambda self: None)
+    monkeypatch.setattr(Blockchain, 'load_data', lambda self: None)
+
+@pytest.fixture(scope="session")
+def _node_instances_template():
+    """Builds the three registered nodes once per session, pickled so each test can clone them cheaply."""
+    return pickle.dumps(_build_nodes([f"node_{i}" for i in range(3)]))
 
 @pytest.fixture
-def node_instances(test_data_dir_consensus):
-    """Creates multiple independent Blockchain instances for testing."""
-    node_count = 3
-    instances = {}
-    node_ids = [f"node_{i}" for i in range(node_count)]
-    ports = [10000 + i for i in range(node_count)] # Assign virtual ports
-
-    for i in range(node_count):
-        node_id = node_ids[i]
-        port = ports[i]
-        data_file = os.path.join(test_data_dir_consensus, f"node_{port}_data.json")
-        # Initialize with unique ID and data file, default stake
-        instance = Blockchain(node_identifier=node_id, data_file=data_file)
-        instance.stakes = {node_id: 100} # Give initial stake for selection later if needed
-        instances[node_id] = instance
+def node_instances(_node_instances_template):
+    """Creates multiple independent Blockchain instances for testing (unpickled from the session template)."""
+    return pickle.loads(_node_instances_template) # Return dict {node_id: Blockchain_instance}
+
+@pytest.fixture(autouse=True)
+def peer_responses(monkeypatch):
+    """
+    Replaces requests.get for every test with a lookup into a plain dict of node id -> response.
+    Tests register what each peer serves, e.g. peer_responses['node_1'] = FakeResp(200, payload).
+    Only blockchain_node's reference to requests is swapped (the real module is left untouched),
+    and the stub has just get and exceptions, so any other network call fails immediately.
+    """
+    registry = {}
+
+    def fake_get(url, *args, **kwargs):
+        return registry.get(_peer_of(url), _NOT_FOUND)
+    monkeypatch.setattr(blockchain_node, 'requests', SimpleNamespace(get=fake_get, exceptions=requests.exceptions))
+    return registry
+
+# --- Helper Functions ---
+
+def _build_nodes(node_ids):
+    """
+    Creates one Blockchain per id, each with a default stake and registered with all the others.
+    Persistence is stubbed while building, since session templates are built outside any test.
+    """
+    saved_load, saved_save = Blockchain.load_data, Blockchain.save_data
+    Blockchain.load_data = Blockchain.save_data = lambda self: None
+    try:
+        instances = {}
+        genesis_data = None
+        for node_id in node_ids:
+            # Initialize with unique ID and default stake; nothing is persisted
+            # Later nodes get their own copy of the first node's genesis block, hash included, so nothing is rehashed
+            # (Block is mutable, so the nodes must not share one instance)
+            genesis = Block(**genesis_data) if genesis_data else None
+            instance = Blockchain(node_identifier=node_id, data_file=None, genesis=genesis)
+            instance.stakes = {node_id: 100} # Give initial stake for selection later if needed
+            instances[node_id] = instance
+            genesis_data = instance.chain[0].to_dict()
+    finally:
+        Blockchain.load_data, Blockchain.save_data = saved_load, saved_save
 
     # Simulate node registration so they know about each other's identifiers (not URLs here)
-    all_node_ids = list(instances.keys())
     for node_id, instance in instances.items():
         # In this test setup, 'nodes' will store node_ids, not URLs
-        instance.nodes = set(nid for nid in all_node_ids if nid != node_id)
-        instance.save_data() # Save initial state
+        instance.nodes = set(nid for nid in node_ids if nid != node_id)
+    return instances
 
-    return instances # Return dict {node_id: Blockchain_instance}
+class FakeResp:
+    """
+    Bare stand-in for a requests response: resolve_conflicts only reads .status_code and .json().
+    The body is serialized once up front and parsed on every .json() call, like a real response,
+    so each caller gets its own fresh dicts.
+    """
+    __slots__ = ('status_code', '_j')
 
-# --- Helper Functions ---
+    def __init__(self, status_code, json_data):
+        self.status_code = status_code
+        self._j = _dumps(json_data)
+
+    def json(self):
+        return _loads(self._j)
+
+_NOT_FOUND = FakeResp(404, None) # Served for unregistered peers; should not happen in these tests
+
+@lru_cache(maxsize=None)
+def _peer_of(url):
+    """resolve_conflicts requests 'http://{node}/chain', so the node id is the URL's hostname."""
+    return urlparse(url).hostname
+
+def chain_payload(snapshot):
+    """Wraps a list of block dicts (taken once per chain) in the /chain response body."""
+    return {'chain': snapshot, 'length': len(snapshot)}
 
 def mine_block(node_instance, transactions=None):
     """Helper to add transactions (optional) and mine a block."""
@@ -62,7 +123,7 @@ def mine_block(node_instance, transactions=None):
 # --- Test Cases ---
 
 def test_initial_sync(node_instances):
-    """Test that initially all nodes have the same genesis block."""
+    """Test that initially all nodes have the same genesis block (equal, but not one shared object)."""
     node_ids = list(node_instances.keys())
     node0 = node_instances[node_ids[0]]
     node1 = node_instances[node_ids[1]]
@@ -73,6 +134,9 @@ def test_initial_sync(node_instances):
     assert len(node2.chain) == 1
     assert node0.last_block.hash == node1.last_block.hash
     assert node1.last_block.hash == node2.last_block.hash
+    # Each node owns its genesis block, so changing one can't leak into the others
+    assert node0.chain[0] is not node1.chain[0] and node1.chain[0] is not node2.chain[0]
+    assert node0.chain[0].transactions is not node1.chain[0].transactions
 
 
 def test_block_propagation_and_receive(node_instances):
@@ -95,23 +159,11 @@ def test_block_propagation_and_receive(node_instances):
     # Basic validation checks from receive_block endpoint logic
     assert block_data['index'] == last_block_node1.index + 1
     assert block_data['previous_hash'] == last_block_node1.hash
-    # Recreate block and verify hash
-    received_block_obj = Block(**block_data)
-    hash_to_verify = received_block_obj.hash
-    # Create a temporary block object for hash recalculation without modifying the original hash
-    temp_block_for_hash_calc = Block(
-        index=received_block_obj.index,
-        timestamp=received_block_obj.timestamp,
-        transactions=received_block_obj.transactions,
-        previous_hash=received_block_obj.previous_hash,
-        validator=received_block_obj.validator
-        # Let hash be calculated automatically
-    )
-    recalculated_hash = temp_block_for_hash_calc.hash
-    assert hash_to_verify == recalculated_hash, "Received block hash verification failed"
-
-    # Add the original block object (with its hash intact) to node1's chain
-    node1.chain.append(received_block_obj)
+    # Verify the hash straight from the received dict
+    assert block_data['hash'] == _header_hash(block_data), "Received block hash verification failed"
+
+    # Recreate the block (with its hash intact) and add it to node1's chain
+    node1.chain.append(Block(**block_data))
     # Clear pending tx (if any matched - none in this case yet)
     node1.save_data()
 
@@ -120,151 +172,48 @@ def test_block_propagation_and_receive(node_instances):
     assert node1.last_block.index == 1
 
 
-def test_resolve_conflicts_longer_chain_wins(node_instances):
-    """Test that resolve_conflicts replaces the chain with a longer valid one."""
-    node_ids = list(node_instances.keys())
-    node0 = node_instances[node_ids[0]] # Shorter chain
-    node1 = node_instances[node_ids[1]] # Longer chain
-    node2 = node_instances[node_ids[2]] # Another node
-
-    # Mine 2 blocks on node1
-    mine_block(node1, transactions=[{'sender': FAUCET_ADDRESS, 'recipient': 'w1', 'amount': 1}])
-    mine_block(node1, transactions=[{'sender': FAUCET_ADDRESS, 'recipient': 'w2', 'amount': 2}])
-    assert len(node1.chain) == 3
-
-    # Node0 only has genesis block
-    assert len(node0.chain) == 1
-
-    # Simulate node0 calling resolve_conflicts
-    # We need to mock requests.get to return node1's chain data
-    node1_chain_data = {
-        'chain': [b.to_dict() for b in node1.chain],
-        'length': len(node1.chain)
-    }
-    node2_chain_data = { # Node2 also has only genesis
-        'chain': [b.to_dict() for b in node2.chain],
-        'length': len(node2.chain)
-    }
-
-    def mock_get_side_effect(url, *args, **kwargs):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        # Determine which node is being queried based on the test setup
-        # Since we store node_ids in instance.nodes, we check against that
-        if node_ids[1] in url: # Requesting from node1
-             mock_resp.json.return_value = node1_chain_data
-        elif node_ids[2] in url: # Requesting from node2
-             mock_resp.json.return_value = node2_chain_data
-        else:
-             mock_resp.status_code = 404 # Should not happen in this test
-        return mock_resp
-
-    with patch('requests.get', side_effect=mock_get_side_effect):
-        # Node0 resolves conflicts. It knows about node1 and node2.
-        replaced = node0.resolve_conflicts()
-
-    assert replaced is True
-    assert len(node0.chain) == 3
-    assert node0.last_block.hash == node1.last_block.hash
-
-
-def test_resolve_conflicts_no_change_if_authoritative(node_instances):
-    """Test that resolve_conflicts doesn't change the chain if it's the longest."""
-    node_ids = list(node_instances.keys())
-    node0 = node_instances[node_ids[0]] # Longest chain
-    node1 = node_instances[node_ids[1]] # Shorter chain
-    node2 = node_instances[node_ids[2]] # Shorter chain
-
-    # Mine 2 blocks on node0
-    mine_block(node0, transactions=[{'sender': FAUCET_ADDRESS, 'recipient': 'w1', 'amount': 1}])
-    mine_block(node0, transactions=[{'sender': FAUCET_ADDRESS, 'recipient': 'w2', 'amount': 2}])
-    assert len(node0.chain) == 3
-
-    # Nodes 1 and 2 only have genesis
-    assert len(node1.chain) == 1
-    assert len(node2.chain) == 1
-
-    # Simulate node0 calling resolve_conflicts
-    node0_chain_data = {
-        'chain': [b.to_dict() for b in node0.chain],
-        'length': len(node0.chain)
-    }
-    node1_chain_data = {
-        'chain': [b.to_dict() for b in node1.chain],
-        'length': len(node1.chain)
-    }
-    node2_chain_data = {
-        'chain': [b.to_dict() for b in node2.chain],
-        'length': len(node2.chain)
-    }
-
-    def mock_get_side_effect(url, *args, **kwargs):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        if node_ids[1] in url:
-             mock_resp.json.return_value = node1_chain_data
-        elif node_ids[2] in url:
-             mock_resp.json.return_value = node2_chain_data
-        else:
-             mock_resp.status_code = 404
-        return mock_resp
-
-    original_hash = node0.last_block.hash
-    with patch('requests.get', side_effect=mock_get_side_effect):
-        replaced = node0.resolve_conflicts()
-
-    assert replaced is False
-    assert len(node0.chain) == 3
-    assert node0.last_block.hash == original_hash # Chain unchanged
-
-
-def test_resolve_conflicts_ignores_invalid_longer_chain(node_instances):
-    """Test that resolve_conflicts ignores a longer chain if it's invalid."""
+# Which node mines the extra block, whether node1's served chain is tampered with,
+# and whether node0 should end up replacing its chain.
+RESOLVE_CONFLICTS_SCENARIOS = {
+    'longer_wins': dict(mine_on=1, tamper=False, expect_replaced=True), # node1 longer, valid
+    'authoritative': dict(mine_on=0, tamper=False, expect_replaced=False), # node0 already longest
+    'invalid_longer': dict(mine_on=1, tamper=True, expect_replaced=False), # node1 longer, invalid
+}
+
+def _assert_resolved(node, replaced, expect_replaced, winner, original_len, original_hash):
+    """Checks resolve_conflicts' result: either adopted winner's chain or left the node's own untouched."""
+    assert replaced is expect_replaced
+    if expect_replaced:
+        assert len(node.chain) == len(winner.chain)
+        assert node.last_block.hash == winner.last_block.hash
+    else:
+        assert len(node.chain) == original_len
+        assert node.last_block.hash == original_hash # Chain unchanged
+
+
+@pytest.mark.parametrize('scenario', list(RESOLVE_CONFLICTS_SCENARIOS))
+def test_resolve_conflicts(node_instances, peer_responses, scenario):
+    """Test that resolve_conflicts adopts only a longer, valid peer chain."""
+    params = RESOLVE_CONFLICTS_SCENARIOS[scenario]
     node_ids = list(node_instances.keys())
-    node0 = node_instances[node_ids[0]] # Shorter chain
-    node1 = node_instances[node_ids[1]] # Longer, invalid chain
-    node2 = node_instances[node_ids[2]] # Shorter chain
+    node0 = node_instances[node_ids[0]] # The node resolving conflicts
+    miner = node_instances[node_ids[params['mine_on']]]
 
-    # Create a longer chain on node1
-    mine_block(node1, transactions=[{'sender': FAUCET_ADDRESS, 'recipient': 'w1', 'amount': 1}])
-    mine_block(node1, transactions=[{'sender': FAUCET_ADDRESS, 'recipient': 'w2', 'amount': 2}])
-    assert len(node1.chain) == 3
+    # Mine 1 block on the chosen node (enough to be longest); every other node only has genesis
+    mine_block(miner, transactions=[{'sender': FAUCET_ADDRESS, 'recipient': 'w1', 'amount': 1}])
+    assert len(miner.chain) == 2
 
-    # Tamper with node1's chain to make it invalid
-    node1_chain_list = [b.to_dict() for b in node1.chain]
-    node1_chain_list[1]['hash'] = "tampered_hash" # Break block 1's hash
+    # Simulate node0 calling resolve_conflicts: node1 and node2 serve their chains
+    snapshots = {nid: [b.to_dict() for b in node_instances[nid].chain] for nid in node_ids[1:]}
+    if params['tamper']:
+        snapshots[node_ids[1]][1]['hash'] = "tampered_hash" # Break block 1's hash
+    for nid, snapshot in snapshots.items():
+        peer_responses[nid] = FakeResp(200, chain_payload(snapshot))
 
-    # Node0 only has genesis block
-    assert len(node0.chain) == 1
+    original_len, original_hash = len(node0.chain), node0.last_block.hash
+    replaced = node0.resolve_conflicts()
 
-    # Simulate node0 calling resolve_conflicts
-    node1_invalid_chain_data = {
-        'chain': node1_chain_list,
-        'length': len(node1_chain_list)
-    }
-    node2_chain_data = {
-        'chain': [b.to_dict() for b in node2.chain],
-        'length': len(node2.chain)
-    }
-
-    def mock_get_side_effect(url, *args, **kwargs):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        if node_ids[1] in url:
-             mock_resp.json.return_value = node1_invalid_chain_data # Return invalid chain
-        elif node_ids[2] in url:
-             mock_resp.json.return_value = node2_chain_data
-        else:
-             mock_resp.status_code = 404
-        return mock_resp
-
-    original_hash = node0.last_block.hash
-    with patch('requests.get', side_effect=mock_get_side_effect):
-        replaced = node0.resolve_conflicts()
-
-    assert replaced is False # Should not replace with invalid chain
-    assert len(node0.chain) == 1
-    assert node0.last_block.hash == original_hash # Chain unchanged
+    _assert_resolved(node0, replaced, params['expect_replaced'], miner, original_len, original_hash)
 
 
 # --- 51% Attack Simulation (Conceptual) ---
@@ -273,33 +222,24 @@ def test_resolve_conflicts_ignores_invalid_longer_chain(node_instances):
 # (in PoS, this relates to stake, but the simulation just picks one validator).
 # This test demonstrates chain replacement, which is the mechanism a 51% attacker would exploit.
 
-@pytest.fixture
-def attack_scenario_nodes(test_data_dir_consensus):
-    """Creates nodes for a 51% attack simulation (1 honest, 2 attackers)."""
-    instances = {}
-    node_ids = ["honest_node", "attacker_1", "attacker_2"]
-    ports = [11000, 11001, 11002]
-
-    for i in range(len(node_ids)):
-        node_id = node_ids[i]
-        port = ports[i]
-        data_file = os.path.join(test_data_dir_consensus, f"node_{port}_data.json")
-        instance = Blockchain(node_identifier=node_id, data_file=data_file)
-        # Attackers might start with more stake in a real PoS scenario
-        instance.stakes = {node_id: 100}
-        instances[node_id] = instance
-
-    # Register nodes
-    all_node_ids = list(instances.keys())
-    for node_id, instance in instances.items():
-        instance.nodes = set(nid for nid in all_node_ids if nid != node_id)
-        instance.save_data()
+@pytest.fixture(scope="session")
+def _attack_scenario_template():
+    """Builds the attack scenario nodes once per session (1 honest, 2 attackers)."""
+    # Attackers might start with more stake in a real PoS scenario
+    return pickle.dumps(_build_nodes(["honest_node", "attacker_1", "attacker_2"]))
 
-    return instances
+@pytest.fixture(scope="module")
+def make_scenario(_attack_scenario_template):
+    """
+    Factory shared by the attack-variant tests: each call returns a fresh set of nodes
+    for a 51% attack simulation (1 honest, 2 attackers), unpickled from the session template.
+    """
+    return lambda: pickle.loads(_attack_scenario_template)
 
 
-def test_51_percent_attack_chain_replacement(attack_scenario_nodes):
+def test_51_percent_attack_chain_replacement(make_scenario, peer_responses):
     """Simulate attackers creating a longer chain and honest node adopting it."""
+    attack_scenario_nodes = make_scenario()
     honest_node = attack_scenario_nodes["honest_node"]
     attacker1 = attack_scenario_nodes["attacker_1"]
     attacker2 = attack_scenario_nodes["attacker_2"] # Attacker 2 helps build the fork
@@ -317,7 +257,6 @@ def test_51_percent_attack_chain_replacement(attack_scenario_nodes):
 
     # Attacker 2 receives attacker1's block
     attacker2.chain.append(Block(**fork_block1.to_dict()))
-    attacker2.save_data()
     assert len(attacker2.chain) == 2
 
     # Attacker 2 mines block 2 (fork)
@@ -327,7 +266,6 @@ def test_51_percent_attack_chain_replacement(attack_scenario_nodes):
 
     # Attacker 1 receives attacker2's block
     attacker1.chain.append(Block(**fork_block2.to_dict()))
-    attacker1.save_data()
     assert len(attacker1.chain) == 3
 
     # Now, attackers have a chain of length 3, honest node has length 2.
@@ -336,28 +274,12 @@ def test_51_percent_attack_chain_replacement(attack_scenario_nodes):
     assert len(attacker2.chain) == 3
 
     # 3. Honest node runs conflict resolution
-    attacker1_chain_data = {
-        'chain': [b.to_dict() for b in attacker1.chain],
-        'length': len(attacker1.chain)
-    }
-    attacker2_chain_data = {
-        'chain': [b.to_dict() for b in attacker2.chain],
-        'length': len(attacker2.chain)
-    }
-
-    def mock_get_side_effect(url, *args, **kwargs):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        if "attacker_1" in url:
-             mock_resp.json.return_value = attacker1_chain_data
-        elif "attacker_2" in url:
-             mock_resp.json.return_value = attacker2_chain_data
-        else:
-             mock_resp.status_code = 404
-        return mock_resp
-
-    with patch('requests.get', side_effect=mock_get_side_effect):
-        replaced = honest_node.resolve_conflicts()
+    # Both attackers hold the same fork, so it is snapshotted once and served by both
+    assert [b.hash for b in attacker1.chain] == [b.hash for b in attacker2.chain]
+    attacker_resp = FakeResp(200, chain_payload([b.to_dict() for b in attacker1.chain]))
+    peer_responses["attacker_1"] = peer_responses["attacker_2"] = attacker_resp
+
+    replaced = honest_node.resolve_conflicts()
 
     # Assert: Honest node should adopt the attackers' longer chain
     assert replaced is True